@@ -0,0 +1,66 @@
+"""
+Named hstores, as opened by the hstore package, plus the queries that its
+dict interface cannot express.
+
+The hstore package keeps each named hstore as a single row of the
+``hstores`` table; the queries here read that row directly so that work
+such as prefix scans happens on the server.
+"""
+
+import hstore
+
+TABLE = 'hstores'
+
+SCAN = (
+    'SELECT kv.key, kv.value FROM {table}, each({table}.data) AS kv '
+    'WHERE {table}.name = %s AND left(kv.key, char_length(%s)) = %s '
+    'ORDER BY kv.key COLLATE "C"').format(table=TABLE)
+
+COUNT = (
+    'SELECT count(*) FROM {table}, each({table}.data) AS kv '
+    'WHERE {table}.name = %s AND left(kv.key, char_length(%s)) = %s'
+    ).format(table=TABLE)
+
+
+class HstoreDB(object):
+
+    def __init__(self, connection, name, create=True):
+        if not (create or hstore.exists(connection, name)):
+            raise ValueError('hstore {} does not exist'.format(name))
+        self.connection = connection
+        self.name = name
+        self.__db = hstore.open(connection, name)
+
+    def __getitem__(self, key):
+        return self.__db[key]
+
+    def __setitem__(self, key, value):
+        self.__db[key] = value
+
+    def __delitem__(self, key):
+        del self.__db[key]
+
+    def __contains__(self, key):
+        return key in self.__db
+
+    def get(self, key, default=None):
+        return self.__db.get(key, default)
+
+    def sync(self):
+        self.__db.sync()
+
+    def destroy(self):
+        self.__db.destroy()
+
+    def scan(self, prefix=u"", include_value=True):
+        """Keys (and values) starting with prefix, in key order"""
+        cursor = self.connection.cursor()
+        cursor.execute(SCAN, (self.name, prefix, prefix))
+        for k, v in cursor:
+            yield (k, v) if include_value else k
+
+    def count(self, prefix=u""):
+        """Number of keys starting with prefix"""
+        cursor = self.connection.cursor()
+        cursor.execute(COUNT, (self.name, prefix, prefix))
+        return cursor.fetchone()[0]
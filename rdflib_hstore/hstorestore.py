@@ -10,10 +10,8 @@ and then a Kyoto Cabinet version by Graham Higgins <gjh@bel-epa.com>,
 and a LevelDB one by Gunnar Grimnes.
 """
 
-import hstore
 import psycopg2
-from bisect import bisect_left
-from itertools import takewhile
+from db import HstoreDB
 from lru import lru_cache, lfu_cache
 from rdflib import URIRef
 from rdflib.store import Store
@@ -43,11 +41,7 @@ class HstoreStore(Store):
         self.__connection = psycopg2.connect(configuration)
 
         def dbopen(name):
-            if create:
-                return hstore.open(self.__connection, name)
-            if hstore.exists(self.__connection, name):
-                return hstore.open(self.__connection, name)
-            raise ValueError('hstore {} does not exist'.format(name))
+            return HstoreDB(self.__connection, name, create)
 
         # create and open the DBs
         self.__indices_info = [None, ] * 3
@@ -160,9 +154,8 @@ class HstoreStore(Store):
             index, prefix, from_key, results_from_key = self.__lookup(
                 (subject, predicate, object), context)
 
-            for key in takewhile(
-                lambda k: k.startswith(prefix), 
-                range_iter(index, prefix, include_value=False)):
+            # materialize the keys, since the loop deletes from the index
+            for key in list(index.scan(prefix, include_value=False)):
                 c,s,p,o = from_key(key)
                 if context is None:
                     contexts_value = index.get(key, u"")
@@ -190,9 +183,7 @@ class HstoreStore(Store):
         index, prefix, from_key, results_from_key = self.__lookup(
             (subject, predicate, object), context)
 
-        for key, value in takewhile(
-            lambda pair: pair[0].startswith(prefix),
-            range_iter(index, prefix)):
+        for key, value in index.scan(prefix):
             yield results_from_key(key, subject, predicate, object, value)
 
     def __len__(self, context=None):
@@ -205,9 +196,7 @@ class HstoreStore(Store):
         else:
             prefix = u"{}^".format(self._to_string(context))
 
-        return len(list(takewhile(
-                lambda k: k.startswith(prefix), 
-                range_iter(self.__indices[0], prefix, include_value=False))))
+        return self.__indices[0].count(prefix)
 
     def bind(self, prefix, namespace):
         bound_prefix = self.__prefix.get(namespace, None)
@@ -223,7 +212,7 @@ class HstoreStore(Store):
         return self.__prefix.get(namespace, None)
 
     def namespaces(self):
-        return range_iter(self.__namespace)
+        return self.__namespace.scan()
 
     def contexts(self, triple=None):
         if triple:
@@ -237,7 +226,7 @@ class HstoreStore(Store):
                     if c:
                         yield self._from_string(c)
         else:
-            for k in range_iter(self.__contexts, include_value=False):
+            for k in self.__contexts.scan(include_value=False):
                 yield self._from_string(k)
 
     @lru_cache(5000)
@@ -354,10 +343,3 @@ def results_from_key_func(i, from_string):
                            for c in contexts_value.split(u"^") if c)
     return from_key
 
-def range_iter(index, start=None, include_value=True):
-    items = sorted(index.items())
-    keys = zip(*items)[0] if len(items) > 0 else []
-    i = 0 if start is None else bisect_left(keys, start)
-    for k,v in items[i:]:
-        yield (k,v) if include_value else k
-
@@ -0,0 +1,104 @@
+"""
+Copy a store from the hstore layout of HstoreStore into the triple-table
+layout of TableStore.
+
+    python -m rdflib_hstore.migrate SOURCE [TARGET]
+
+SOURCE and TARGET are PostgreSQL connection strings; TARGET defaults to
+SOURCE, since the two layouts use different tables and can share one
+database, but the target tables must be empty. Term ids are carried over
+unchanged and the source is only read.
+"""
+
+import argparse
+import psycopg2
+from cStringIO import StringIO
+from rdflib.graph import QuotedGraph
+
+from rdflib_hstore.db import HstoreDB
+from rdflib_hstore.tablestore import TableStore
+
+
+def migrate(source, target=None, batch_size=10000):
+    """Copy the hstore-format store at source into a TableStore at target;
+    returns the TableStore, open."""
+    connection = psycopg2.connect(source)
+    store = TableStore()
+    store.open(target or source, create=True)
+    out = psycopg2.connect(target or source)
+    try:
+        def db(name):
+            return HstoreDB(connection, name, create=False)
+
+        cursor = out.cursor()
+
+        def copy(table, columns, rows):
+            cursor.copy_from(
+                StringIO(''.join(
+                    '\t'.join(row) + '\n' for row in rows)),
+                table, columns=columns)
+
+        def batches(rows):
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+        # terms keep their ids
+        for batch in batches(
+                (k, i) for k, i in db('k2i').scan()
+                if not k.startswith('__')):  # skip the term counter
+            cursor.execute(
+                'INSERT INTO terms (id, key) '
+                'SELECT * FROM unnest(%s::bigint[], %s::bytea[])',
+                ([ int(i) for k, i in batch ],
+                 [ psycopg2.Binary(k) for k, i in batch ]))
+        cursor.execute(
+            "SELECT setval('terms_id_seq', coalesce(max(id), 0) + 1, false) "
+            "FROM terms")
+
+        # contexts are quoted if they are formulae
+        i2k = db('i2k')
+        for batch in batches(db('contexts').scan(include_value=False)):
+            copy('contexts', ('id', 'quoted'), (
+                (c, 't' if isinstance(
+                    store.node_pickler.loads(i2k[c]), QuotedGraph) else 'f')
+                for c in batch))
+
+        # the conjunctive keys (^s^p^o^) only repeat the contextual ones
+        for batch in batches(db(u"c^s^p^o^").scan(include_value=False)):
+            copy('quads', ('c', 's', 'p', 'o'), (
+                key.split(u"^")[:4] for key in batch
+                if not key.startswith(u"^")))
+
+        for prefix, namespace in db('namespace').scan():
+            cursor.execute(
+                'INSERT INTO namespaces VALUES (%s, %s) '
+                'ON CONFLICT DO NOTHING', (prefix, namespace))
+
+        out.commit()
+    finally:
+        out.close()
+        connection.close()
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Copy an hstore-format store into the triple-table '
+        'layout.')
+    parser.add_argument('source', help='connection string of the store')
+    parser.add_argument('target', nargs='?',
+                        help='connection string to copy to '
+                        '(default: the source)')
+    parser.add_argument('--batch-size', type=int, default=10000)
+    args = parser.parse_args()
+    migrate(args.source, args.target, args.batch_size).close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""
+A relational alternative to HstoreStore: quads are rows of integer term
+ids in an ordinary table, rather than keys of three huge hstore values.
+
+The table carries covering B-tree indexes for the three orderings that
+HstoreStore's build_lookup_dict chooses between (cspo, cpos, cosp), both
+scoped to a context and, with the context last, for the conjunctive
+graph. Writes touch single rows and lookups get real query plans.
+
+An existing hstore-format store can be copied into this layout with
+rdflib_hstore.migrate.
+"""
+
+import psycopg2
+from rdflib.store import Store
+from rdflib.store import VALID_STORE
+
+from rdflib_hstore.lru import lru_cache, lfu_cache
+
+TABLES = ('quads', 'contexts', 'terms', 'namespaces')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    id bigserial PRIMARY KEY,
+    key bytea NOT NULL);
+CREATE UNIQUE INDEX IF NOT EXISTS terms_key ON terms (md5(key));
+CREATE TABLE IF NOT EXISTS contexts (
+    id bigint PRIMARY KEY,
+    quoted boolean NOT NULL DEFAULT false);
+CREATE TABLE IF NOT EXISTS quads (
+    c bigint NOT NULL,
+    s bigint NOT NULL,
+    p bigint NOT NULL,
+    o bigint NOT NULL,
+    PRIMARY KEY (c, s, p, o));
+CREATE INDEX IF NOT EXISTS quads_cpos ON quads (c, p, o, s);
+CREATE INDEX IF NOT EXISTS quads_cosp ON quads (c, o, s, p);
+CREATE INDEX IF NOT EXISTS quads_spoc ON quads (s, p, o, c);
+CREATE INDEX IF NOT EXISTS quads_posc ON quads (p, o, s, c);
+CREATE INDEX IF NOT EXISTS quads_ospc ON quads (o, s, p, c);
+CREATE TABLE IF NOT EXISTS namespaces (
+    prefix text PRIMARY KEY,
+    namespace text NOT NULL UNIQUE);
+"""
+
+INTERN = """
+WITH new AS (
+    INSERT INTO terms (key) VALUES (%(key)s)
+    ON CONFLICT (md5(key)) DO NOTHING RETURNING id)
+SELECT id FROM new UNION ALL
+SELECT id FROM terms WHERE md5(key) = md5(%(key)s)
+"""
+
+ADD = """
+INSERT INTO contexts (id, quoted) VALUES (%(c)s, %(quoted)s)
+ON CONFLICT (id) DO UPDATE SET quoted = contexts.quoted OR excluded.quoted;
+INSERT INTO quads (c, s, p, o) VALUES (%(c)s, %(s)s, %(p)s, %(o)s)
+ON CONFLICT DO NOTHING
+"""
+
+# conjunctive queries see every context that is not a quoted formula
+CONJUNCTIVE = "q.c IN (SELECT id FROM contexts WHERE NOT quoted)"
+
+
+class TableStore(Store):
+    context_aware = True
+    formula_aware = True
+    transaction_aware = False
+    batch_unification = False
+
+    def __init__(self, configuration=None, identifier=None):
+        self.__identifier = identifier
+        self.__connection = None
+        self.__ids = {}
+        super(TableStore, self).__init__(configuration)
+        self.configuration = configuration
+
+    def __get_identifier(self):
+        return self.__identifier
+    identifier = property(__get_identifier)
+
+    def closed(self):
+        return self.__connection is None or self.__connection.closed
+
+    def open(self, configuration, create=True):
+        self.__connection = psycopg2.connect(configuration)
+        self.__connection.autocommit = True
+        cursor = self.__connection.cursor()
+        if create:
+            cursor.execute(SCHEMA)
+        else:
+            for name in TABLES:
+                cursor.execute('SELECT to_regclass(%s)', (name,))
+                if cursor.fetchone()[0] is None:
+                    self.__connection.close()
+                    raise ValueError('table {} does not exist'.format(name))
+        return VALID_STORE
+
+    def close(self, commit_pending_transaction=False):
+        self.__connection.close()
+
+    def destroy(self, configuration=None):
+        assert not self.closed(), 'The store must be open.'
+        self.__execute('DROP TABLE IF EXISTS {}'.format(', '.join(TABLES)))
+        self.__ids.clear()
+
+    def add(self, (subject, predicate, object), context, quoted=False):
+        assert not self.closed(), 'The store must be open.'
+        assert context != self, 'Cannot add triple directly to store'
+
+        # Add the triple to the Store, triggering TripleAdded events
+        Store.add(self, (subject, predicate, object), context, quoted)
+
+        self.__execute(ADD, dict(
+            c=self._to_id(context),
+            s=self._to_id(subject),
+            p=self._to_id(predicate),
+            o=self._to_id(object),
+            quoted=bool(quoted)))
+
+    def remove(self, (subject, predicate, object), context):
+        assert not self.closed(), "The Store must be open."
+        Store.remove(self, (subject, predicate, object), context)
+
+        if context == self:
+            context = None
+        where, args = self.__where((subject, predicate, object), context)
+        if where is None:
+            return  # some bound term was never stored
+        self.__execute('DELETE FROM quads q WHERE ' + where, args)
+
+        if context is not None:
+            if subject is None and predicate is None and object is None:
+                self.__execute('DELETE FROM contexts WHERE id = %s',
+                               (args['c'],))
+
+    def triples(self, (subject, predicate, object), context=None):
+        """A generator over all the triples matching """
+        assert not self.closed(), "The Store must be open."
+        if context == self:
+            context = None
+
+        where, args = self.__where((subject, predicate, object), context)
+        if where is None:
+            return
+
+        terms = ' '.join(
+            'LEFT JOIN terms k{0} ON k{0}.id = q.{0}'.format(name)
+            for name, term in zip('spo', (subject, predicate, object))
+            if term is None)
+        keys = [ 'k{}.key'.format(name) if term is None else 'NULL'
+                 for name, term in zip('spo', (subject, predicate, object)) ]
+
+        cursor = self.__connection.cursor()
+        if context is None:
+            cursor.execute(
+                'SELECT {keys}, array_agg(q.c) FROM quads q {terms} '
+                'WHERE {where} GROUP BY {columns}'.format(
+                    keys=', '.join(keys), terms=terms, where=where,
+                    columns=', '.join(
+                        ['q.s', 'q.p', 'q.o'] + [ k for k in keys
+                                                  if k != 'NULL' ])), args)
+        else:
+            cursor.execute(
+                'SELECT {keys}, NULL FROM quads q {terms} '
+                'WHERE {where}'.format(
+                    keys=', '.join(keys), terms=terms, where=where), args)
+
+        for s, p, o, contexts in cursor:
+            triple = (subject if s is None else self._from_key(s),
+                      predicate if p is None else self._from_key(p),
+                      object if o is None else self._from_key(o))
+            if contexts is None:
+                yield triple, iter((context,))
+            else:
+                yield triple, (self._from_id(c) for c in contexts)
+
+    def __len__(self, context=None):
+        assert not self.closed(), "The Store must be open."
+        if context == self:
+            context = None
+
+        if context is None:
+            sql = ('SELECT count(*) FROM (SELECT DISTINCT s, p, o '
+                   'FROM quads q WHERE {}) AS t'.format(CONJUNCTIVE))
+            args = None
+        else:
+            c = self._to_id(context, create=False)
+            if c is None:
+                return 0
+            sql, args = 'SELECT count(*) FROM quads WHERE c = %s', (c,)
+        return self.__execute(sql, args).fetchone()[0]
+
+    def bind(self, prefix, namespace):
+        self.__execute(
+            'DELETE FROM namespaces WHERE prefix = %(prefix)s '
+            'OR namespace = %(namespace)s; '
+            'INSERT INTO namespaces VALUES (%(prefix)s, %(namespace)s)',
+            dict(prefix=prefix, namespace=namespace))
+
+    def namespace(self, prefix):
+        row = self.__execute(
+            'SELECT namespace FROM namespaces WHERE prefix = %s',
+            (prefix,)).fetchone()
+        return None if row is None else row[0]
+
+    def prefix(self, namespace):
+        row = self.__execute(
+            'SELECT prefix FROM namespaces WHERE namespace = %s',
+            (namespace,)).fetchone()
+        return None if row is None else row[0]
+
+    def namespaces(self):
+        return iter(self.__execute(
+            'SELECT prefix, namespace FROM namespaces ORDER BY prefix '
+            'COLLATE "C"').fetchall())
+
+    def contexts(self, triple=None):
+        if triple:
+            where, args = self.__where(triple, None)
+            if where is None:
+                return
+            cursor = self.__execute(
+                'SELECT DISTINCT t.key FROM quads q '
+                'JOIN terms t ON t.id = q.c WHERE ' + where, args)
+        else:
+            cursor = self.__execute(
+                'SELECT t.key FROM contexts x JOIN terms t ON t.id = x.id')
+        for (k,) in cursor.fetchall():
+            yield self._from_key(k)
+
+    @lru_cache(5000)
+    @lfu_cache(5000)
+    def _from_id(self, i):
+        """rdflib term from term id"""
+        row = self.__execute(
+            'SELECT key FROM terms WHERE id = %s', (i,)).fetchone()
+        if row is None:
+            raise Exception('Key for {} is None'.format(i))
+        return self._from_key(row[0])
+
+    @lru_cache(5000)
+    @lfu_cache(5000)
+    def _from_key(self, k):
+        """rdflib term from its pickled key"""
+        return self.node_pickler.loads(str(k))
+
+    def _to_id(self, term, create=True):
+        """term id from rdflib term, or None if absent and not created"""
+        i = self.__ids.get(term, None)
+        if i is None:
+            key = psycopg2.Binary(self.node_pickler.dumps(term))
+            if create:
+                row = self.__execute(INTERN, dict(key=key)).fetchone()
+            else:
+                row = self.__execute(
+                    'SELECT id FROM terms WHERE md5(key) = md5(%s)',
+                    (key,)).fetchone()
+            if row is None:
+                return None
+            i = self.__ids[term] = row[0]
+        return i
+
+    def __where(self, (subject, predicate, object), context):
+        """SQL condition on quads q for a pattern, or None if it cannot
+        match because some bound term has no id"""
+        clauses, args = [], {}
+        for name, term in zip('cspo', (context, subject, predicate, object)):
+            if term is not None:
+                i = self._to_id(term, create=False)
+                if i is None:
+                    return None, None
+                clauses.append('q.{0} = %({0})s'.format(name))
+                args[name] = i
+        if context is None:
+            clauses.append(CONJUNCTIVE)
+        return ' AND '.join(clauses), args
+
+    def __execute(self, sql, args=None):
+        cursor = self.__connection.cursor()
+        cursor.execute(sql, args)
+        return cursor
@@ -32,6 +32,8 @@ context2 = URIRef(u'context-2')
 
 class BaseCase(unittest.TestCase):
 
+    store = 'hstore'
+
     def execute(self, command):
         if command in [ 'CREATE', 'DROP' ]:
             server, dbname = connection_uri.rsplit('/',1) 
@@ -47,6 +49,8 @@ class BaseCase(unittest.TestCase):
         self.execute('CREATE')
         plugin.register(
             'hstore', Store, 'rdflib_hstore.hstorestore', 'HstoreStore')
+        plugin.register(
+            'hstore-table', Store, 'rdflib_hstore.tablestore', 'TableStore')
         self.graphs = []
 
     def tearDown(self):
@@ -83,7 +87,7 @@ class BaseCase(unittest.TestCase):
 class TestHstoreGraph(BaseCase):
 
     def open_graph(self):
-        graph = Graph(store='hstore')
+        graph = Graph(store=self.store)
         graph.open(connection_uri, create=True)
         self.graphs.append(graph)
         return graph
@@ -219,7 +223,7 @@ class TestHstoreGraph(BaseCase):
 class TestHstoreConjunctiveGraph(BaseCase):
 
     def open_graph(self):
-        graph = ConjunctiveGraph(store='hstore')
+        graph = ConjunctiveGraph(store=self.store)
         graph.open(connection_uri, create=True)
         self.graphs.append(graph)
         return graph
@@ -261,7 +265,7 @@ class TestHstoreConjunctiveGraph(BaseCase):
 class ContextTestCase(BaseCase):
 
     def open_graph(self):
-        graph = ConjunctiveGraph(store='hstore')
+        graph = ConjunctiveGraph(store=self.store)
         graph.open(connection_uri, create=True)
         self.graphs.append(graph)
         return graph
@@ -520,7 +524,7 @@ class ContextTestCase(BaseCase):
 class FormulaTestCase(BaseCase):
 
     def open_graph(self):
-        graph = ConjunctiveGraph(store='hstore')
+        graph = ConjunctiveGraph(store=self.store)
         graph.open(connection_uri, create=True)
         self.graphs.append(graph)
         return graph
@@ -607,5 +611,50 @@ _:foo a rdfs:Class.
         assert len(universe) == 0
 
 
+class TestTableGraph(TestHstoreGraph):
+    store = 'hstore-table'
+
+
+class TestTableConjunctiveGraph(TestHstoreConjunctiveGraph):
+    store = 'hstore-table'
+
+
+class TableContextTestCase(ContextTestCase):
+    store = 'hstore-table'
+
+
+class TableFormulaTestCase(FormulaTestCase):
+    store = 'hstore-table'
 
 
+class MigrateTestCase(BaseCase):
+
+    def test_migrate(self):
+        from rdflib_hstore.migrate import migrate
+
+        graph = ConjunctiveGraph(store='hstore')
+        graph.open(connection_uri, create=True)
+        self.graphs.append(graph)
+        graph.bind("foaf", "http://xmlns.com/foaf/0.1/")
+        self.add_stuff(graph)
+        Graph(graph.store, context1).add((pizza, hates, tarek))
+        Graph(graph.store, context2).add((pizza, hates, tarek))
+        formula = QuotedGraph(graph.store, BNode())
+        formula.add((tarek, likes, cheese))
+
+        graph.store.close()
+        migrated = ConjunctiveGraph(migrate(connection_uri))
+        graph.store.open(connection_uri, create=False)
+        self.graphs.append(migrated)
+        self.assertEquals(len(migrated), len(graph))
+        self.assertEquals(set(migrated), set(graph))
+        self.assertEquals(
+            set(c.identifier for c in migrated.contexts()),
+            set(c.identifier for c in graph.contexts()))
+        self.assertEquals(
+            len(migrated.get_context(context1)), 1)
+        self.assertEquals(
+            len(list(migrated.triples((tarek, likes, cheese)))), 1)
+        self.assertEquals(
+            migrated.store.namespace('foaf'),
+            graph.store.namespace('foaf'))